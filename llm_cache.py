@@ -0,0 +1,434 @@
+"""
+Response caching for LLM calls.
+
+Completions are cached by an exact hash of the request parameters that
+influence the output (model, temperature, prompt, completion parameters
+such as max_tokens, and system prompt). An
+in-process LRU is always used, optionally backed by an on-disk cache that
+survives restarts; when a Redis URL is configured the cache is also shared
+through Redis so that every worker benefits from each other's results.
+
+A semantic cache can additionally be placed behind the exact cache. It
+embeds the variable part of a request and returns a stored response when a
+previous request of the same kind was similar enough, so near-duplicate
+requests ("AI / business execs" vs "artificial intelligence / business
+professionals") also hit.
+
+Requirements:
+    - diskcache
+    - redis (optional, only when a Redis URL is configured)
+    - faiss-cpu, numpy and sentence-transformers (optional, only for SemanticCache)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import diskcache
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis is optional; the in-process cache works without it
+    redis = None
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Semantic caching is optional
+    faiss = None
+
+DEFAULT_TTL = 86400
+DEFAULT_CACHE_DIR = ".llm_cache"
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+
+
+def cache_key(
+    model: str,
+    temperature: float,
+    prompt: str,
+    system: str = "",
+    params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build a deterministic cache key for an LLM request.
+
+    Args:
+        model (str): The model name
+        temperature (float): The sampling temperature
+        prompt (str): The prompt sent to the model
+        system (str): The system prompt sent along with it, if any
+        params (Optional[Dict[str, Any]]): Other completion parameters that shape
+                                           the response, such as max_tokens
+
+    Returns:
+        str: A hex digest identifying the request
+    """
+    payload = json.dumps(
+        {"m": model, "t": temperature, "p": prompt, "s": system, "o": params or {}}, sort_keys=True
+    )
+    return hashlib.blake2b(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match cache for LLM responses.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept in process
+        ttl (int): Time-to-live of each entry in seconds
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: int = DEFAULT_TTL,
+        redis_url: Optional[str] = None,
+        path: Optional[str] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept in process
+            ttl (int): Time-to-live of each entry in seconds
+            redis_url (Optional[str]): Redis connection URL; when omitted the
+                                       cache is not shared through Redis
+            path (Optional[str]): Directory of the on-disk cache; when omitted
+                                  entries are not persisted
+
+        Raises:
+            ImportError: If a Redis URL is given but redis is not installed
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._disk = diskcache.Cache(path) if path else None
+        self._redis = None
+
+        if redis_url:
+            if redis is None:
+                raise ImportError("The redis package is required to use a Redis cache")
+            self._redis = redis.from_url(redis_url, decode_responses=True)
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Create a cache configured from environment variables.
+
+        LLM_CACHE_DIR sets the on-disk cache directory (default ".llm_cache",
+        empty to disable), LLM_CACHE_TTL the time-to-live in seconds (default
+        one day) and REDIS_URL the optional Redis instance.
+
+        Returns:
+            ResponseCache: The configured cache
+        """
+        return cls(
+            ttl=int(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL)),
+            redis_url=os.getenv("REDIS_URL"),
+            path=os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+        )
+
+    def _remember(self, key: str, value: str):
+        self._local[key] = (time.monotonic() + self.ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss
+        """
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                return value
+            del self._local[key]
+
+        if self._disk is not None:
+            value = await asyncio.to_thread(self._disk.get, key)
+            if value is not None:
+                self._remember(key, value)
+                return value
+
+        if self._redis is not None:
+            value = await self._redis.get(key)
+            if value is not None:
+                self._remember(key, value)
+            return value
+
+        return None
+
+    async def set(self, key: str, value: str):
+        """
+        Store a response in the cache.
+
+        Args:
+            key (str): The cache key
+            value (str): The response to cache
+        """
+        self._remember(key, value)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value, expire=self.ttl)
+        if self._redis is not None:
+            await self._redis.setex(key, self.ttl, value)
+
+    async def aclose(self):
+        """
+        Close the on-disk cache and the Redis connection, if any.
+        """
+        if self._disk is not None:
+            self._disk.close()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+class SemanticCache:
+    """
+    Similarity-based cache for LLM responses.
+
+    Entries are grouped in namespaces, one per kind of request (prompt
+    template, completion parameters, model, temperature and system prompt),
+    and only the variable part of a request, such as the domain and
+    audience, is embedded. Within a namespace, queries are compared with a
+    FAISS inner-product index over normalized vectors, so search scores are
+    cosine similarities.
+
+    Each namespace is persisted in ``path`` as a single file, which workers
+    update under a shared lock by merging their new entries into the
+    current file and replacing it atomically.
+
+    Attributes:
+        path (str): Directory holding the persisted namespaces
+        threshold (float): Minimum cosine similarity for a hit
+        ttl (int): Time-to-live of each entry in seconds
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        ttl: int = DEFAULT_TTL,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+    ):
+        """
+        Initialize the cache. Persisted namespaces are loaded on first use.
+
+        Args:
+            path (str): Directory holding the persisted namespaces
+            threshold (float): Minimum cosine similarity for a hit
+            ttl (int): Time-to-live of each entry in seconds
+            model_name (str): Sentence-transformers model used for embeddings
+
+        Raises:
+            ImportError: If faiss, numpy or sentence-transformers is not installed
+        """
+        if faiss is None:
+            raise ImportError(
+                "faiss-cpu, numpy and sentence-transformers are required to use SemanticCache"
+            )
+
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.model_name = model_name
+        self._model = None
+        self._namespaces: Dict[str, "_SemanticNamespace"] = {}
+        # Holds the cross-process locks guarding each namespace file
+        self._locks = diskcache.Cache(os.path.join(path, "locks"))
+
+    def _embed(self, query: str):
+        # The encoder is loaded on first use to keep construction cheap
+        if self._model is None:
+            self._model = SentenceTransformer(self.model_name)
+        vector = self._model.encode([query], normalize_embeddings=True)
+        return np.asarray(vector, dtype="float32")
+
+    async def _namespace(self, namespace: str) -> "_SemanticNamespace":
+        entries = self._namespaces.get(namespace)
+        if entries is None:
+            entries = _SemanticNamespace(
+                os.path.join(self.path, f"{namespace}.npz"),
+                diskcache.Lock(self._locks, namespace, expire=60),
+            )
+            self._namespaces[namespace] = entries
+        await entries.ensure_loaded()
+        return entries
+
+    async def get(self, namespace: str, query: str) -> Optional[str]:
+        """
+        Look up the response stored for the most similar query.
+
+        Args:
+            namespace (str): The kind of request, see the class docstring
+            query (str): The variable part of the request
+
+        Returns:
+            Optional[str]: The cached response, or None if no live entry
+                           reaches the similarity threshold
+        """
+        entries = await self._namespace(namespace)
+        if not entries.responses:
+            return None
+
+        vector = await asyncio.to_thread(self._embed, query)
+        return entries.search(vector, self.threshold)
+
+    async def set(self, namespace: str, query: str, response: str):
+        """
+        Store a response under the embedding of its query.
+
+        Args:
+            namespace (str): The kind of request, see the class docstring
+            query (str): The variable part of the request
+            response (str): The response to cache
+        """
+        vector = await asyncio.to_thread(self._embed, query)
+        entries = await self._namespace(namespace)
+        entries.add(vector, response, time.time() + self.ttl)
+        await entries.save()
+
+    async def aclose(self):
+        """
+        Close the store holding the namespace locks.
+        """
+        self._locks.close()
+
+
+# Entry ids, vectors, responses and expiry times, as persisted for a namespace
+_Entries = Tuple[List[str], Any, List[str], List[float]]
+
+
+class _SemanticNamespace:
+    """The entries of one SemanticCache namespace and their persisted file."""
+
+    def __init__(self, file_path: str, file_lock: "diskcache.Lock"):
+        self.file_path = file_path
+        self.ids: List[str] = []
+        self.vectors = None
+        self.responses: List[str] = []
+        self.expiries: List[float] = []
+        self.index = None
+        self.version = 0
+        self._saved_version = 0
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._file_lock = file_lock
+
+    async def ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                self._merge(await asyncio.to_thread(self._read))
+                self._loaded = True
+
+    def search(self, vector, threshold: float) -> Optional[str]:
+        scores, ids = self.index.search(vector, 1)
+        best = ids[0][0]
+        if best < 0 or scores[0][0] < threshold or self.expiries[best] <= time.time():
+            return None
+        return self.responses[best]
+
+    def add(self, vector, response: str, expires_at: float):
+        self._append([uuid.uuid4().hex], vector, [response], [expires_at])
+        self.version += 1
+
+    def _append(self, ids: List[str], vectors, responses: List[str], expiries: List[float]):
+        if self.index is None:
+            self.index = faiss.IndexFlatIP(vectors.shape[1])
+            self.vectors = vectors
+        else:
+            self.vectors = np.vstack([self.vectors, vectors])
+        self.index.add(vectors)
+        self.ids.extend(ids)
+        self.responses.extend(responses)
+        self.expiries.extend(expiries)
+
+    def _merge(self, entries: Optional[_Entries]):
+        # Take in the live entries other workers have persisted
+        if entries is None:
+            return
+        ids, vectors, responses, expiries = entries
+        known = set(self.ids)
+        now = time.time()
+        new = [i for i, entry_id in enumerate(ids) if entry_id not in known and expiries[i] > now]
+        if new:
+            self._append(
+                [ids[i] for i in new],
+                np.ascontiguousarray(vectors[new]),
+                [responses[i] for i in new],
+                [expiries[i] for i in new],
+            )
+
+    async def save(self):
+        async with self._lock:
+            # A concurrent save may already have written these entries
+            if self.version <= self._saved_version:
+                return
+            version = self.version
+            snapshot = (list(self.ids), self.vectors, list(self.responses), list(self.expiries))
+            self._merge(await asyncio.to_thread(self._write, snapshot))
+            self._saved_version = version
+
+    def _read(self) -> Optional[_Entries]:
+        if not os.path.exists(self.file_path):
+            return None
+        with np.load(self.file_path) as data:
+            vectors = data["vectors"]
+            entries = json.loads(data["entries"].item())
+        return (
+            [entry["id"] for entry in entries],
+            vectors,
+            [entry["response"] for entry in entries],
+            [entry["expires_at"] for entry in entries],
+        )
+
+    def _write(self, snapshot: _Entries) -> Optional[_Entries]:
+        # Other workers persist their own entries to the same file, so merge
+        # with its current content under the shared lock rather than
+        # overwriting it with this worker's view. The persisted entries are
+        # returned for this worker to take in.
+        with self._file_lock:
+            stored = self._read()
+            ids, vectors, responses, expiries = snapshot
+            if stored is not None:
+                known = set(ids)
+                extra = [i for i, entry_id in enumerate(stored[0]) if entry_id not in known]
+                ids = ids + [stored[0][i] for i in extra]
+                vectors = np.vstack([vectors, stored[1][extra]])
+                responses = responses + [stored[2][i] for i in extra]
+                expiries = expiries + [stored[3][i] for i in extra]
+
+            now = time.time()
+            live = [i for i, expires_at in enumerate(expiries) if expires_at > now]
+            entries = [
+                {"id": ids[i], "response": responses[i], "expires_at": expiries[i]} for i in live
+            ]
+
+            # Vectors and responses live in one file, replaced atomically, so
+            # readers never see one without the other
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.file_path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, vectors=vectors[live], entries=np.array(json.dumps(entries)))
+                os.replace(tmp_path, self.file_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return stored
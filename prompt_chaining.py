@@ -13,16 +13,269 @@ Each step includes validation gates to ensure quality control throughout the pro
 Requirements:
     - openai>=1.0.0
     - python-dotenv
-    - Python 3.7+
+    - diskcache
+    - tiktoken
+    - tenacity
+    - httpx[http2]
+    - Python 3.10+
 """
 
 from dotenv import load_dotenv
-load_dotenv()
 
+import asyncio
+import httpx
+import io
+import json
+import logging
 import openai
 import os
+import re
+import textwrap
 import time
-from typing import List, Dict, Optional, Union
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple, Union
+
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from llm_cache import DEFAULT_TTL, ResponseCache, SemanticCache, cache_key
+from rate_limiter import RateLimiter, count_tokens
+
+logger = logging.getLogger(__name__)
+
+MODEL = "gpt-4o-mini"
+
+# Shared by every call so that the request prefix is identical across the
+# chain. It only holds the rules the steps and their parsers rely on: padding it
+# past the 1024 tokens OpenAI's automatic prompt caching needs would add more
+# input tokens to every call than caching saves, since only the padding itself
+# would be discounted.
+SYSTEM_PROMPT = """You are an experienced blog writer and editor working inside an automated \
+publishing pipeline. Your output is parsed by a program, so follow the formatting rules exactly.
+
+General rules:
+- Output only what the request asks for, with no introduction, closing remarks or comments.
+- Do not use Markdown code fences or headings (lines starting with #).
+- Be accurate: do not invent statistics, quotes, studies, people or dates.
+
+When asked for blog post topics:
+- Write one topic per line, with no blank lines and no numbering, bullets or descriptions.
+- Put the most broadly appealing topic first; the pipeline continues with it.
+
+When asked for an outline:
+- Write each section heading on its own unindented line, with no numbering.
+- Write each key point of a section on its own line below the heading, indented by two spaces, \
+with no bullet or number in front of it.
+- Include four to seven sections, each with two to five short key points.
+
+When asked to write a section:
+- Write flowing prose covering every point given, in order.
+- Do not repeat the section title or add headings of your own.
+
+When asked to edit and polish a post:
+- Return the complete revised post, keeping every section title on its own line as in the draft.
+- Preserve the meaning, facts, structure and approximate length of the draft."""
+
+# Step prompts, dedented so that source indentation is not sent (and billed) as input tokens
+TOPICS_PROMPT = textwrap.dedent("""
+    Generate 5 engaging blog post topics for {target_audience}
+    in the {domain} domain. Each topic should be unique and interesting.
+""").strip()
+
+OUTLINE_PROMPT = textwrap.dedent("""
+    Create a detailed outline for a blog post about '{topic}'.
+    Include main sections and key points for each section.
+""").strip()
+
+SECTION_PROMPT = textwrap.dedent("""
+    Write a detailed section for a blog post covering the following points: {points}.
+    Do not include the section title in your response.
+""").strip()
+
+POLISH_PROMPT = textwrap.dedent("""
+    Please edit and polish the following blog post content.
+    Improve clarity, fix any grammatical issues, and enhance the overall flow:
+
+    {content}
+""").strip()
+
+# Completion size assumed when reserving tokens with the rate limiter, for
+# calls that do not cap it with max_tokens
+EXPECTED_COMPLETION_TOKENS = 1000
+
+# Completion caps for each step, sized to what the step actually needs; the
+# outline cap covers the longest outline the system prompt allows (7 sections
+# of 5 points). Responses cut off by a cap are never cached.
+TOPICS_MAX_TOKENS = 250
+OUTLINE_MAX_TOKENS = 1000
+SECTION_MAX_TOKENS = 500
+MODEL_MAX_COMPLETION_TOKENS = 16384
+
+# Plain-text responses are complete once the model starts emitting blank lines
+TEXT_STOP_SEQUENCES = ["\n\n\n"]
+
+# Bullet or number in front of a list item ("- ", "* ", "1. ", "2) "), which the
+# model sometimes adds despite the system prompt
+LIST_MARKER = r'(?:[-*\u2022]|\d+[.)])[ \t]+'
+LIST_MARKER_PATTERN = re.compile('^' + LIST_MARKER)
+
+# One outline line: unindented lines are section headings, indented lines their
+# points; list markers are left out of the text
+OUTLINE_LINE_PATTERN = re.compile(
+    r'^(?P<indent>[ \t]+)?(?:' + LIST_MARKER + r')?(?P<text>\S.*?)[ \t\r]*$', re.M
+)
+
+# Sentence boundaries used to spot repeated sentences in a draft
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+# Drafts reading at least this easily (Flesch reading ease) are not polished
+MIN_READING_EASE = 60
+
+# Words, and the vowel groups used to estimate their syllables
+WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+VOWEL_GROUP_PATTERN = re.compile(r'[aeiouy]+')
+
+# API call timeouts in seconds. A non-streamed response only arrives once the
+# whole completion is generated, which for a long polished post can take well
+# over a minute, so those calls get a longer read timeout; otherwise they would
+# time out and be retried, paying for every attempt.
+REQUEST_TIMEOUT = 60.0
+COMPLETION_READ_TIMEOUT = 300.0
+
+# Errors worth retrying: anything else (bad request, authentication, ...) fails fast
+TRANSIENT_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+def _count_syllables(word: str) -> int:
+    word = word.lower()
+    syllables = len(VOWEL_GROUP_PATTERN.findall(word))
+    # A final "e" is usually silent ("make"), but not in "-le" ("table")
+    if syllables > 1 and word.endswith('e') and not word.endswith(('le', 'ee')):
+        syllables -= 1
+    return max(syllables, 1)
+
+def flesch_reading_ease(content: str) -> float:
+    """
+    Estimate the Flesch reading ease of a text; higher scores read more easily.
+    
+    Syllables are estimated from vowel groups, which is close enough to rank
+    drafts without a pronunciation dictionary.
+    
+    Args:
+        content (str): The text to score
+        
+    Returns:
+        float: The reading ease score
+    """
+    words = WORD_PATTERN.findall(content)
+    if not words:
+        return 100.0
+    sentences = sum(1 for sentence in SENTENCE_BOUNDARY_PATTERN.split(content) if sentence.strip())
+    syllables = sum(_count_syllables(word) for word in words)
+    return 206.835 - 1.015 * len(words) / sentences - 84.6 * syllables / len(words)
+
+def needs_polish(content: str) -> bool:
+    """
+    Decide whether a draft is worth sending through the polishing step.
+    
+    A draft needs polishing if it is hard to read, as measured by its Flesch
+    reading ease, or if it repeats any sentence.
+    
+    Args:
+        content (str): The blog post content
+        
+    Returns:
+        bool: True if the content should be polished
+    """
+    if flesch_reading_ease(content) < MIN_READING_EASE:
+        return True
+    
+    seen = set()
+    for sentence in SENTENCE_BOUNDARY_PATTERN.split(content):
+        normalized = " ".join(sentence.lower().split())
+        if not normalized:
+            continue
+        if normalized in seen:
+            return True
+        seen.add(normalized)
+    return False
+
+class _InflightCall:
+    """
+    An API call shared by every caller waiting for the same response.
+    
+    The call runs in its own task, so it is not tied to whichever caller
+    started it; it is only cancelled once every waiter has gone away.
+    """
+
+    def __init__(self, coro):
+        self.task = asyncio.ensure_future(coro)
+        self.waiters = 0
+        self.abandoned = False
+
+    async def wait(self):
+        self.waiters += 1
+        try:
+            return await asyncio.shield(self.task)
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and not self.task.done():
+                self.abandoned = True
+                self.task.cancel()
+
+class _StreamFanout:
+    """
+    A streamed API call shared by every caller waiting for the same response.
+    
+    The upstream stream is consumed by its own task; each subscriber replays
+    the pieces received so far and then follows along live. The stream is
+    only cancelled once every subscriber has gone away.
+    """
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.parts: List[str] = []
+        self.subscribers = 0
+        self.abandoned = False
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]):
+        try:
+            async with aclosing(source):
+                async for part in source:
+                    self.parts.append(part)
+                    self._changed.set()
+        finally:
+            self._changed.set()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        self.subscribers += 1
+        try:
+            sent = 0
+            while True:
+                while sent < len(self.parts):
+                    yield self.parts[sent]
+                    sent += 1
+                if self.task.done():
+                    # Re-raise the upstream failure, if any
+                    self.task.result()
+                    return
+                self._changed.clear()
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.task.done():
+                self.abandoned = True
+                self.task.cancel()
 
 class PromptChaining:
     """
@@ -33,46 +286,333 @@ class PromptChaining:
     are implemented between steps to ensure output meets minimum standards.
     
     Attributes:
-        client (openai.OpenAI): OpenAI client instance for making API calls
+        client (openai.AsyncOpenAI): Async OpenAI client instance for making API calls
+        cache (ResponseCache): Exact-match cache for deterministic responses
+        semantic_cache (Optional[SemanticCache]): Similarity cache consulted on
+                                                  exact-cache misses, if enabled
+        rate_limiter (RateLimiter): Limiter keeping API calls within the account's
+                                    request and token budgets
     """
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         """
         Initialize the PromptChaining instance with OpenAI API credentials.
         
         Args:
             api_key (str): OpenAI API key for authentication
+            cache (Optional[ResponseCache]): Response cache to use; defaults to one
+                                             configured from the environment
+                                             (see ResponseCache.from_env)
+            semantic_cache (Optional[SemanticCache]): Similarity cache to use; defaults
+                                                      to one stored in SEMANTIC_CACHE_DIR
+                                                      when that variable is set
+            rate_limiter (Optional[RateLimiter]): Rate limiter to use; defaults to one
+                                                  configured from OPENAI_RPM and OPENAI_TPM
+            http_client (Optional[httpx.AsyncClient]): HTTP client used for API calls;
+                                                       defaults to a pooled HTTP/2 client so
+                                                       that calls share connections; a client
+                                                       passed in is left open by aclose
         """
-        self.client = openai.OpenAI(api_key=api_key)
+        self._owns_http_client = http_client is None
+        if http_client is None:
+            http_client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=REQUEST_TIMEOUT,
+            )
+        
+        # Retries are handled by tenacity in _send_request
+        self.client = openai.AsyncOpenAI(api_key=api_key, max_retries=0, http_client=http_client)
+        self.cache = cache or ResponseCache.from_env()
+        
+        if semantic_cache is None and os.getenv("SEMANTIC_CACHE_DIR"):
+            semantic_cache = SemanticCache(
+                os.getenv("SEMANTIC_CACHE_DIR"), ttl=int(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL))
+            )
+        self.semantic_cache = semantic_cache
+        self.rate_limiter = rate_limiter or RateLimiter.from_env()
+        self._system_prompt_tokens = count_tokens(SYSTEM_PROMPT, MODEL)
+        self._inflight: Dict[str, _InflightCall] = {}
+        self._inflight_streams: Dict[str, _StreamFanout] = {}
 
-    def generate_llm_response(self, prompt: str) -> str:
+    async def aclose(self):
+        """
+        Release the HTTP connections and cache resources held by this instance.
         """
-        Generate a response from the LLM using the provided prompt.
+        # Closing the OpenAI client closes its HTTP client, which belongs to
+        # the caller when one was passed in
+        if self._owns_http_client:
+            await self.client.close()
+        await self.cache.aclose()
+        if self.semantic_cache is not None:
+            await self.semantic_cache.aclose()
+
+    def _semantic_key(
+        self, similar: Optional[Tuple[str, str]], temperature: float, params: Dict
+    ) -> Optional[Tuple[str, str]]:
+        # Only the variable part of a prompt is embedded, so entries are kept
+        # apart per template and model settings
+        if self.semantic_cache is None or similar is None:
+            return None
+        template, query = similar
+        kind = json.dumps([template, params], sort_keys=True)
+        return cache_key(MODEL, temperature, kind, system=SYSTEM_PROMPT), query
+
+    async def _cache_lookup(self, key: str, semantic_key: Optional[Tuple[str, str]]) -> Optional[str]:
+        cached = await self.cache.get(key)
+        if cached is None and semantic_key is not None:
+            cached = await self.semantic_cache.get(*semantic_key)
+            if cached is not None:
+                await self.cache.set(key, cached)
+        return cached
+
+    async def _cache_store(self, key: str, semantic_key: Optional[Tuple[str, str]], response: str):
+        await self.cache.set(key, response)
+        if semantic_key is not None:
+            await self.semantic_cache.set(*semantic_key, response)
+
+    async def agenerate_llm_response(
+        self,
+        prompt: str,
+        cacheable: bool = False,
+        max_tokens: Optional[int] = None,
+        stop: Optional[List[str]] = None,
+        similar: Optional[Tuple[str, str]] = None,
+        validate: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Asynchronously generate a response from the LLM using the provided prompt.
+        
+        Cacheable calls are sent with temperature 0 so that the same prompt
+        always maps to the same answer, and are served from the cache on repeats
+        or, when the semantic cache is enabled and ``similar`` is given, on
+        requests with the same template and a sufficiently similar query.
+        A response is only cached once ``validate`` accepts it, so a response
+        failing a step's gate is not served again on retries.
+        Identical requests issued while one is already in flight share its result.
         
         Args:
             prompt (str): The input prompt for the LLM
+            cacheable (bool): Whether the response may be cached and reused
+            max_tokens (Optional[int]): Maximum number of tokens to generate
+            stop (Optional[List[str]]): Sequences at which generation stops
+            similar (Optional[Tuple[str, str]]): The prompt template and the variable
+                                                 part of the prompt, for cacheable calls
+                                                 that may reuse a similar request's response
+            validate (Optional[Callable[[str], None]]): Called with the response before
+                                                        it is cached; raises if the
+                                                        response must not be cached
             
         Returns:
             str: The generated response text
             
         Raises:
-            Exception: If there's an error in API communication
+            openai.OpenAIError: If the API call fails, after retrying transient errors
+            ValueError: If ``validate`` rejects the response
         """
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
+        temperature = 0 if cacheable else 0.7
+        params = self._completion_params(max_tokens, stop)
+        key = cache_key(MODEL, temperature, prompt, system=SYSTEM_PROMPT, params=params)
+        semantic_key = self._semantic_key(similar, temperature, params) if cacheable else None
+        
+        if cacheable:
+            cached = await self._cache_lookup(key, semantic_key)
+            if cached is not None:
+                return cached
+        
+        # Coalesce identical concurrent requests onto the call already in flight
+        call = self._inflight.get(key)
+        # A finished call is only forgotten by a done callback, which may not have run yet
+        if call is None or call.abandoned or call.task.done():
+            call = _InflightCall(self._fetch_completion(
+                key, semantic_key, prompt, temperature, cacheable, params, validate
+            ))
+            self._inflight[key] = call
+            call.task.add_done_callback(lambda _: self._forget_inflight(self._inflight, key, call))
+        
+        return await call.wait()
+
+    @staticmethod
+    def _forget_inflight(registry: Dict, key: str, entry):
+        if registry.get(key) is entry:
+            del registry[key]
+
+    async def _fetch_completion(
+        self,
+        key: str,
+        semantic_key: Optional[Tuple[str, str]],
+        prompt: str,
+        temperature: float,
+        cacheable: bool,
+        params: Dict,
+        validate: Optional[Callable[[str], None]],
+    ) -> str:
+        content, finish_reason = await self._create_completion(prompt, temperature, params)
+        if cacheable and content and not self._truncated(finish_reason, params):
+            if validate is not None:
+                validate(content)
+            await self._cache_store(key, semantic_key, content)
+        return content
+
+    async def _create_completion(
+        self, prompt: str, temperature: float, params: Dict
+    ) -> Tuple[str, Optional[str]]:
+        response = await self._send_request(prompt, temperature=temperature, **params)
+        return response.choices[0].message.content, response.choices[0].finish_reason
+
+    @staticmethod
+    def _truncated(finish_reason: Optional[str], params: Dict) -> bool:
+        # A response cut off by max_tokens may still pass a step's gate, so it
+        # must not be cached as if it were complete
+        if finish_reason != "length":
+            return False
+        logger.warning("Response cut off at max_tokens=%s, not caching it", params.get("max_tokens"))
+        return True
+
+    @staticmethod
+    def _completion_params(max_tokens: Optional[int] = None, stop: Optional[List[str]] = None) -> Dict:
+        params = {}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if stop:
+            params["stop"] = stop
+        return params
+
+    @retry(
+        wait=wait_random_exponential(min=1, max=30),
+        stop=stop_after_attempt(6),
+        retry=retry_if_exception_type(TRANSIENT_ERRORS),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+    async def _send_request(self, prompt: str, **params):
+        completion_tokens = params.get("max_tokens", EXPECTED_COMPLETION_TOKENS)
+        tokens = self._system_prompt_tokens + count_tokens(prompt, MODEL) + completion_tokens
+        await self.rate_limiter.acquire(tokens)
+        
+        if not params.get("stream"):
+            params["timeout"] = httpx.Timeout(REQUEST_TIMEOUT, read=COMPLETION_READ_TIMEOUT)
+        
+        raw_response = await self.client.chat.completions.with_raw_response.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            **params,
+        )
+        self.rate_limiter.update_from_headers(raw_response.headers)
+        return raw_response.parse()
+
+    async def agenerate_llm_response_stream(
+        self,
+        prompt: str,
+        cacheable: bool = False,
+        max_tokens: Optional[int] = None,
+        stop: Optional[List[str]] = None,
+        similar: Optional[Tuple[str, str]] = None,
+        validate: Optional[Callable[[str], None]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as it is generated.
+        
+        Cacheable calls follow the same rules as in agenerate_llm_response; a
+        cache hit is yielded as a single piece. Identical streams requested while
+        one is already in flight share it, later callers first receiving the
+        pieces generated so far.
+        
+        Args:
+            prompt (str): The input prompt for the LLM
+            cacheable (bool): Whether the response may be cached and reused
+            max_tokens (Optional[int]): Maximum number of tokens to generate
+            stop (Optional[List[str]]): Sequences at which generation stops
+            similar (Optional[Tuple[str, str]]): The prompt template and the variable
+                                                 part of the prompt, as in
+                                                 agenerate_llm_response
+            validate (Optional[Callable[[str], None]]): Called with the whole response
+                                                        before it is cached, as in
+                                                        agenerate_llm_response
+            
+        Yields:
+            str: Successive pieces of the generated response text
+            
+        Raises:
+            openai.OpenAIError: If the API call fails, after retrying transient
+                                errors when opening the stream
+            ValueError: If ``validate`` rejects the response, once it has been
+                        streamed
+        """
+        temperature = 0 if cacheable else 0.7
+        params = self._completion_params(max_tokens, stop)
+        key = cache_key(MODEL, temperature, prompt, system=SYSTEM_PROMPT, params=params)
+        semantic_key = self._semantic_key(similar, temperature, params) if cacheable else None
+        
+        if cacheable:
+            cached = await self._cache_lookup(key, semantic_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        # Coalesce identical concurrent streams onto the one already in flight
+        fanout = self._inflight_streams.get(key)
+        if fanout is None or fanout.abandoned or fanout.task.done():
+            fanout = _StreamFanout(self._stream_completion(
+                key, semantic_key, prompt, temperature, cacheable, params, validate
+            ))
+            self._inflight_streams[key] = fanout
+            fanout.task.add_done_callback(
+                lambda _: self._forget_inflight(self._inflight_streams, key, fanout)
             )
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"Error generating response: {e}")
-            return ""
+        
+        async with aclosing(fanout.subscribe()) as parts:
+            async for part in parts:
+                yield part
 
-    def generate_blog_topics(self, domain: str, target_audience: str) -> List[str]:
+    async def _stream_completion(
+        self,
+        key: str,
+        semantic_key: Optional[Tuple[str, str]],
+        prompt: str,
+        temperature: float,
+        cacheable: bool,
+        params: Dict,
+        validate: Optional[Callable[[str], None]],
+    ) -> AsyncIterator[str]:
+        stream = await self._send_request(prompt, temperature=temperature, stream=True, **params)
+        parts = []
+        finish_reason = None
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+                if chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+        finally:
+            # Release the HTTP response even when the consumer stops early
+            await stream.close()
+        
+        if cacheable and parts and not self._truncated(finish_reason, params):
+            content = "".join(parts)
+            if validate is not None:
+                validate(content)
+            await self._cache_store(key, semantic_key, content)
+
+    async def agenerate_blog_topics(self, domain: str, target_audience: str) -> List[str]:
         """
         Step 1: Generate potential blog topics based on domain and audience.
         
+        This collects astream_blog_topics, so both share one request and cache entry.
+        
         Args:
             domain (str): The subject area for the blog post
             target_audience (str): The intended audience for the content
@@ -83,19 +623,55 @@ class PromptChaining:
         Raises:
             ValueError: If fewer than 3 valid topics are generated
         """
-        prompt = f"""Generate 5 engaging blog post topics for {target_audience} 
-        in the {domain} domain. Each topic should be unique and interesting."""
+        topics_stream = self.astream_blog_topics(domain, target_audience)
+        async with aclosing(topics_stream):
+            return [topic async for topic in topics_stream]
+
+    async def astream_blog_topics(self, domain: str, target_audience: str) -> AsyncIterator[str]:
+        """
+        Step 1, streamed: yield each blog topic as soon as its line is complete.
         
-        response = self.generate_llm_response(prompt)
-        topics = [topic.strip() for topic in response.split('\n') if topic.strip()]
+        This lets the caller start working on the first topic, e.g. creating
+        its outline, while the remaining topics are still being generated.
         
-        # Gate: Check if we have enough topics
-        if len(topics) < 3:
-            raise ValueError("Not enough topics generated. Please try again.")
+        Args:
+            domain (str): The subject area for the blog post
+            target_audience (str): The intended audience for the content
+            
+        Yields:
+            str: The generated blog topics, one at a time
             
-        return topics
+        Raises:
+            ValueError: If fewer than 3 valid topics are generated, once the
+                        whole response has been streamed
+        """
+        prompt = TOPICS_PROMPT.format(domain=domain, target_audience=target_audience)
+        
+        topics = []
+        pending = ""
+        topics_stream = self.agenerate_llm_response_stream(
+            prompt,
+            cacheable=True,
+            max_tokens=TOPICS_MAX_TOKENS,
+            stop=TEXT_STOP_SEQUENCES,
+            similar=(TOPICS_PROMPT, f"{domain} / {target_audience}"),
+            validate=lambda response: self._check_topics(self._parse_topics(response)),
+        )
+        async with aclosing(topics_stream):
+            async for delta in topics_stream:
+                # Topics are parsed line by line, as _parse_topics does
+                *lines, pending = (pending + delta).split('\n')
+                for line in lines:
+                    if topic := self._parse_topic(line):
+                        topics.append(topic)
+                        yield topic
+        if topic := self._parse_topic(pending):
+            topics.append(topic)
+            yield topic
+        
+        self._check_topics(topics)
 
-    def create_outline(self, topic: str) -> Dict[str, List[str]]:
+    async def acreate_outline(self, topic: str) -> Dict[str, List[str]]:
         """
         Step 2: Create a structured outline for the chosen topic.
         
@@ -109,33 +685,61 @@ class PromptChaining:
         Raises:
             ValueError: If the outline has fewer than 3 sections
         """
-        prompt = f"""Create a detailed outline for a blog post about '{topic}'.
-        Include main sections and key points for each section."""
+        prompt = OUTLINE_PROMPT.format(topic=topic)
         
-        response = self.generate_llm_response(prompt)
+        response = await self.agenerate_llm_response(
+            prompt,
+            cacheable=True,
+            max_tokens=OUTLINE_MAX_TOKENS,
+            stop=TEXT_STOP_SEQUENCES,
+            similar=(OUTLINE_PROMPT, topic),
+            validate=lambda response: self._check_outline(self._parse_outline(response)),
+        )
         
-        # Parse the outline into a structured format
-        sections: Dict[str, List[str]] = {}
-        current_section: Optional[str] = None
+        outline = self._parse_outline(response)
+        self._check_outline(outline)
+        return outline
+
+    @staticmethod
+    def _parse_topic(line: str) -> str:
+        return LIST_MARKER_PATTERN.sub('', line.strip()).strip()
+
+    @classmethod
+    def _parse_topics(cls, response: str) -> List[str]:
+        return [topic for line in response.split('\n') if (topic := cls._parse_topic(line))]
+
+    @staticmethod
+    def _parse_outline(response: str) -> Dict[str, List[str]]:
+        # Parse the outline into a structured format in a single regex pass
+        sections: List[Tuple[str, List[str]]] = []
         
-        for line in response.split('\n'):
-            if line.strip():
-                if not line.startswith('  '):
-                    current_section = line.strip()
-                    sections[current_section] = []
-                else:
-                    sections[current_section].append(line.strip())
+        for match in OUTLINE_LINE_PATTERN.finditer(response):
+            if match['indent'] is None:
+                sections.append((match['text'], []))
+            elif sections:
+                sections[-1][1].append(match['text'])
         
+        return dict(sections)
+
+    @staticmethod
+    def _check_topics(topics: List[str]):
+        # Gate: Check if we have enough topics
+        if len(topics) < 3:
+            raise ValueError("Not enough topics generated. Please try again.")
+
+    @staticmethod
+    def _check_outline(outline: Dict[str, List[str]]):
         # Gate: Check if outline has enough sections
-        if len(sections) < 3:
+        if len(outline) < 3:
             raise ValueError("Outline is too short. Please generate a more detailed outline.")
-            
-        return sections
 
-    def write_content(self, outline: Dict[str, List[str]]) -> str:
+    async def awrite_content(self, outline: Dict[str, List[str]]) -> str:
         """
         Step 3: Generate the actual content based on the outline.
         
+        This collects awrite_content_stream, so sections are written the same
+        way whether or not the caller streams them.
+        
         Args:
             outline (Dict[str, List[str]]): The structured outline with sections
                                           and bullet points
@@ -146,29 +750,82 @@ class PromptChaining:
         Raises:
             ValueError: If the generated content is less than 300 words
         """
-        content = []
+        content = io.StringIO()
+        content_stream = self.awrite_content_stream(outline)
+        async with aclosing(content_stream):
+            async for delta in content_stream:
+                content.write(delta)
+        return content.getvalue()
+
+    async def awrite_content_stream(self, outline: Dict[str, List[str]]) -> AsyncIterator[str]:
+        """
+        Step 3, streamed: generate the content and yield it as it is written.
+        
+        Each section is its own request. All sections are generated
+        concurrently, but their text is yielded in outline order: the first
+        section streams live while later ones buffer, and each buffer is
+        flushed as soon as the sections before it are done. Each section is
+        preceded by its heading on its own line.
         
-        for section, points in outline.items():
-            prompt = f"""Write a detailed section for a blog post covering the following points: {', '.join(points)}. 
-            Do not include the section title in your response."""
+        Args:
+            outline (Dict[str, List[str]]): The structured outline with sections
+                                          and bullet points
+                                          
+        Yields:
+            str: Successive pieces of the blog post content
             
-            section_content = self.generate_llm_response(prompt)
-            content.append(f"\n{section}\n{section_content}")
+        Raises:
+            ValueError: If the generated content is less than 300 words, once
+                        the whole content has been streamed
+        """
+        queues: List[asyncio.Queue] = [asyncio.Queue() for _ in outline]
         
-        final_content = "\n".join(content)
+        async def produce(points: List[str], queue: asyncio.Queue):
+            section_stream = self.agenerate_llm_response_stream(
+                SECTION_PROMPT.format(points=', '.join(points)), max_tokens=SECTION_MAX_TOKENS
+            )
+            try:
+                async with aclosing(section_stream):
+                    async for delta in section_stream:
+                        queue.put_nowait(delta)
+            finally:
+                queue.put_nowait(None)
         
+        tasks = [
+            asyncio.ensure_future(produce(points, queue))
+            for points, queue in zip(outline.values(), queues)
+        ]
+        
+        content = io.StringIO()
+        try:
+            for i, (section, queue, task) in enumerate(zip(outline, queues, tasks)):
+                header = f"\n{section}\n" if i == 0 else f"\n\n{section}\n"
+                content.write(header)
+                yield header
+                
+                while (delta := await queue.get()) is not None:
+                    content.write(delta)
+                    yield delta
+                await task
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        self._check_content(content.getvalue())
+
+    @staticmethod
+    def _check_content(content: str):
         # Gate: Check if content meets minimum length
-        if len(final_content.split()) < 300:
+        if len(content.split()) < 300:
             raise ValueError("Content is too short. Please generate more detailed content.")
-            
-        return final_content
 
-    def edit_and_polish(self, content: str) -> str:
+    async def aedit_and_polish(self, content: str) -> str:
         """
         Step 4: Polish and improve the generated content.
         
         This step focuses on improving clarity, fixing grammatical issues,
-        and enhancing the overall flow of the content.
+        and enhancing the overall flow of the content. Drafts that already read
+        well (see needs_polish) are returned unchanged without calling the LLM.
         
         Args:
             content (str): The initial blog post content
@@ -179,12 +836,15 @@ class PromptChaining:
         Raises:
             ValueError: If no meaningful edits were made to the content
         """
-        prompt = f"""Please edit and polish the following blog post content. 
-        Improve clarity, fix any grammatical issues, and enhance the overall flow:
+        # Scoring a long draft takes a while, so keep it off the event loop
+        if not await asyncio.to_thread(needs_polish, content):
+            return content
         
-        {content}"""
+        prompt = POLISH_PROMPT.format(content=content)
         
-        final_content = self.generate_llm_response(prompt)
+        # The polished post is about as long as the draft; leave some headroom
+        max_tokens = min(int(count_tokens(content, MODEL) * 1.25), MODEL_MAX_COMPLETION_TOKENS)
+        final_content = await self.agenerate_llm_response(prompt, max_tokens=max_tokens)
         
         # Gate: Check if content was actually modified
         if final_content.strip() == content.strip():
@@ -192,13 +852,16 @@ class PromptChaining:
             
         return final_content
 
-def main():
+async def main():
     """
     Main function to demonstrate the prompt chaining workflow.
     
     This function shows the complete process of generating a blog post,
     from topic selection to final polishing, with error handling.
     """
+    if not os.getenv("OPEN_AI_API_KEY"):
+        load_dotenv()
+    
     api_key = os.getenv("OPEN_AI_API_KEY")
     if not api_key:
         raise ValueError("OpenAI API key not found in environment variables")
@@ -207,29 +870,28 @@ def main():
     
     try:
         # Step 1: Generate topics
-        topics = blog_writer.generate_blog_topics(
+        topics = await blog_writer.agenerate_blog_topics(
             domain="artificial intelligence",
             target_audience="business professionals"
         )
         print("Generated Topics:", topics)
         
-        # Let's use the first topic
-        chosen_topic = topics[0]
-        
-        # Step 2: Create outline
-        outline = blog_writer.create_outline(chosen_topic)
+        # Step 2: Create an outline for the first topic
+        outline = await blog_writer.acreate_outline(topics[0])
         print("\nOutline:", outline)
         
         # Step 3: Write content
-        content = blog_writer.write_content(outline)
+        content = await blog_writer.awrite_content(outline)
         print("\nInitial Content:", content)
         
         # Step 4: Polish and finalize
-        final_content = blog_writer.edit_and_polish(content)
+        final_content = await blog_writer.aedit_and_polish(content)
         print("\nFinal Content:", final_content)
         
-    except ValueError as e:
+    except (ValueError, openai.OpenAIError) as e:
         print(f"Error in blog generation process: {e}")
+    finally:
+        await blog_writer.aclose()
         
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
@@ -2,20 +2,73 @@
 FastAPI implementation of the Prompt Chaining blog generator
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import asyncio
+import threading
+from contextlib import asynccontextmanager
 from sse_starlette.sse import EventSourceResponse
 import json
+import logging
+import logging.handlers
+import queue
 from prompt_chaining import PromptChaining
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+if not os.getenv("OPEN_AI_API_KEY"):
+    load_dotenv()
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+def setup_logging() -> Tuple[logging.handlers.QueueHandler, logging.handlers.QueueListener]:
+    """
+    Route log records through a queue drained by a background thread.
+
+    Request handlers only enqueue records, so they never wait on the stdout
+    lock or on a flush while holding up the event loop. The returned handler
+    and listener are undone by teardown_logging.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    if root.level > logging.INFO:
+        root.setLevel(logging.INFO)
+
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return queue_handler, listener
+
+def teardown_logging(queue_handler: logging.handlers.QueueHandler, listener: logging.handlers.QueueListener):
+    """
+    Undo setup_logging, so that a restarted app does not log every record twice.
+    """
+    logging.getLogger().removeHandler(queue_handler)
+    listener.stop()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Set up logging for the lifetime of the app, and release the shared
+    PromptChaining instance on shutdown.
+    """
+    global _blog_generator
+    log_setup = setup_logging()
+    try:
+        yield
+    finally:
+        if _blog_generator is not None:
+            await _blog_generator.aclose()
+            _blog_generator = None
+        teardown_logging(*log_setup)
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -26,48 +79,140 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the PromptChaining class
-blog_generator = PromptChaining(os.getenv("OPEN_AI_API_KEY"))
+_blog_generator: Optional[PromptChaining] = None
+_blog_generator_lock = threading.Lock()
+
+def get_blog_generator() -> PromptChaining:
+    """
+    Return the shared PromptChaining instance, creating it on first use.
+
+    Creating it lazily keeps imports cheap and lets tests swap it out
+    through ``app.dependency_overrides``. Sync dependencies run in a thread
+    pool, so creation is locked to keep concurrent first requests from each
+    building their own instance.
+    """
+    global _blog_generator
+    with _blog_generator_lock:
+        if _blog_generator is None:
+            _blog_generator = PromptChaining(os.environ["OPEN_AI_API_KEY"])
+        return _blog_generator
+
+class ClientDisconnected(Exception):
+    """Raised when the SSE client goes away while a step is still running."""
+
+
+async def wait_for_disconnect(request: Request, poll_interval: float = 0.5):
+    """Return once the client behind ``request`` has disconnected."""
+    while not await request.is_disconnected():
+        await asyncio.sleep(poll_interval)
+
+
+async def run_until_disconnect(request: Request, coro):
+    """
+    Run a chain step, cancelling it as soon as the client disconnects.
+
+    The step and a disconnect watcher are raced against each other so an
+    abandoned request stops spending tokens immediately instead of only
+    being noticed between steps.
+    """
+    step = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait({step, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Also reached when this coroutine itself is cancelled, e.g. by
+        # sse_starlette noticing the disconnect first
+        watcher.cancel()
+        if not step.done():
+            step.cancel()
+
+    if step not in done:
+        raise ClientDisconnected()
+    return step.result()
+
+
+async def stream_until_disconnect(request: Request, stream):
+    """
+    Iterate over a streamed chain step, stopping it as soon as the client disconnects.
+
+    A single disconnect watcher is shared by every item of the stream.
+    """
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(stream.__anext__())
+            done, _ = await asyncio.wait({step, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if step not in done:
+                raise ClientDisconnected()
+
+            try:
+                item = step.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        # Also reached when this generator itself is cancelled or closed: stop
+        # the pending item, then close the stream so its own cleanup runs
+        watcher.cancel()
+        if step is not None and not step.done():
+            step.cancel()
+            await asyncio.gather(step, return_exceptions=True)
+        await stream.aclose()
 
 @app.get("/generate-blog/stream")
-async def generate_blog(request: Request, domain: str, target_audience: str):
+async def generate_blog(
+    request: Request,
+    domain: str,
+    target_audience: str,
+    blog_generator: PromptChaining = Depends(get_blog_generator),
+):
     async def event_generator():
         try:
-            # Step 1: Generate topics
-            topics = blog_generator.generate_blog_topics(domain, target_audience)
-            event_data = {'event': 'topics', 'data': {'topics': topics}}
-            yield f"data: {json.dumps(event_data)}\n\n"
-            await asyncio.sleep(0.1)
+            # Step 1: Generate topics, starting step 2 on the first one as soon as it arrives
+            topics = []
+            outline_task = None
+            try:
+                async for topic in stream_until_disconnect(
+                    request, blog_generator.astream_blog_topics(domain, target_audience)
+                ):
+                    if outline_task is None:
+                        outline_task = asyncio.ensure_future(blog_generator.acreate_outline(topic))
+                    topics.append(topic)
 
-            if await request.is_disconnected():
-                return
+                event_data = {'event': 'topics', 'data': {'topics': topics}}
+                yield f"data: {json.dumps(event_data)}\n\n"
+
+                # Step 2: Wait for the outline of the first topic
+                chosen_topic = topics[0]
+                outline = await run_until_disconnect(request, outline_task)
+            finally:
+                if outline_task is not None and not outline_task.done():
+                    outline_task.cancel()
 
-            # Step 2: Create outline
-            chosen_topic = topics[0]
-            outline = blog_generator.create_outline(chosen_topic)
             event_data = {'event': 'outline', 'data': {'outline': outline, 'topic': chosen_topic}}
             yield f"data: {json.dumps(event_data)}\n\n"
-            await asyncio.sleep(0.1)
 
-            if await request.is_disconnected():
-                return
+            # Step 3: Generate content, forwarding it as it is written
+            content_parts = []
+            async for delta in stream_until_disconnect(request, blog_generator.awrite_content_stream(outline)):
+                content_parts.append(delta)
+                event_data = {'event': 'delta', 'data': delta}
+                yield f"data: {json.dumps(event_data)}\n\n"
 
-            # Step 3: Generate content
-            content = blog_generator.write_content(outline)
+            content = "".join(content_parts)
             event_data = {'event': 'initial_content', 'data': {'content': content}}
             yield f"data: {json.dumps(event_data)}\n\n"
-            await asyncio.sleep(0.1)
-
-            if await request.is_disconnected():
-                return
 
             # Step 4: Polish content
-            final_content = blog_generator.edit_and_polish(content)
+            final_content = await run_until_disconnect(request, blog_generator.aedit_and_polish(content))
             event_data = {'event': 'final_content', 'data': {'content': final_content}}
             yield f"data: {json.dumps(event_data)}\n\n"
 
+        except ClientDisconnected:
+            return
         except Exception as e:
-            print(f"Error in generation: {str(e)}")
+            logger.exception("Error in generation")
             error_data = {'event': 'error', 'data': {'error': str(e)}}
             yield f"data: {json.dumps(error_data)}\n\n"
 
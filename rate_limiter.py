@@ -0,0 +1,131 @@
+"""
+Client-side rate limiting for OpenAI API calls.
+
+OpenAI enforces per-minute budgets on both requests and tokens. Rather
+than running into 429 responses and backing off, calls are admitted only
+when both budgets allow, and the budgets are kept in step with the
+remaining quota the API reports in its response headers.
+
+Requirements:
+    - tiktoken
+"""
+
+import asyncio
+import os
+import time
+from functools import lru_cache
+from typing import Mapping
+
+import tiktoken
+
+DEFAULT_REQUEST_LIMIT = 500
+DEFAULT_TOKEN_LIMIT = 200000
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str) -> "tiktoken.Encoding":
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens of a text as seen by the given model.
+
+    Args:
+        text (str): The text to count
+        model (str): The model name
+
+    Returns:
+        int: The number of tokens
+    """
+    return len(_encoding(model).encode(text))
+
+
+class RateLimiter:
+    """
+    Leaky-bucket limiter over a request budget and a token budget.
+
+    Both budgets refill continuously at their per-minute rate. Callers are
+    admitted in arrival order once a request slot and enough tokens are free.
+
+    Attributes:
+        request_limit (int): Requests allowed per minute
+        token_limit (int): Tokens allowed per minute
+    """
+
+    def __init__(self, request_limit: int = DEFAULT_REQUEST_LIMIT, token_limit: int = DEFAULT_TOKEN_LIMIT):
+        """
+        Initialize the limiter with full budgets.
+
+        Args:
+            request_limit (int): Requests allowed per minute
+            token_limit (int): Tokens allowed per minute
+        """
+        self.request_limit = request_limit
+        self.token_limit = token_limit
+        self._requests = float(request_limit)
+        self._tokens = float(token_limit)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Create a limiter configured from the OPENAI_RPM and OPENAI_TPM
+        environment variables.
+
+        Returns:
+            RateLimiter: The configured limiter
+        """
+        return cls(
+            request_limit=int(os.getenv("OPENAI_RPM", DEFAULT_REQUEST_LIMIT)),
+            token_limit=int(os.getenv("OPENAI_TPM", DEFAULT_TOKEN_LIMIT)),
+        )
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.request_limit, self._requests + elapsed * self.request_limit / 60)
+        self._tokens = min(self.token_limit, self._tokens + elapsed * self.token_limit / 60)
+
+    async def acquire(self, tokens: int):
+        """
+        Wait until a request using the given number of tokens may be sent.
+
+        Args:
+            tokens (int): Expected tokens used by the request, prompt and
+                          completion included
+        """
+        tokens = min(tokens, self.token_limit)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+
+                wait = max(
+                    (1 - self._requests) * 60 / self.request_limit,
+                    (tokens - self._tokens) * 60 / self.token_limit,
+                )
+                await asyncio.sleep(wait)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """
+        Align the budgets with the remaining quota reported by the API.
+
+        Args:
+            headers (Mapping[str, str]): Response headers of an API call
+        """
+        self._refill()
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None:
+            self._requests = min(self._requests, float(remaining_requests))
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            self._tokens = min(self._tokens, float(remaining_tokens))